@@ -14,8 +14,10 @@ setup(
   name="shadowsprite",
   version="0.1.0",
   packages=find_packages(),
+  python_requires=">=3.12",
   install_requires=[
         "anyio>=4.9.0",
+        "cachetools>=5.3.0",
         "certifi>=2025.4.26",
         "discord.py>=2.0",
         "h11>=0.16.0",
@@ -28,6 +30,9 @@ setup(
         "sniffio>=1.3.1",
         "typing_extensions>=4.13.2",
   ],
+  extras_require={
+        "uvloop": ["uvloop>=0.19.0; sys_platform != 'win32'"],
+  },
   entry_points={
     "console_scripts": [
       # this creates `venv/bin/shadowsprite`
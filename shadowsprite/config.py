@@ -9,9 +9,14 @@ Centralized configuration for ShadowDaemon:
 """
 import os
 from dotenv import load_dotenv
-load_dotenv()   # <-- reads .env into os.environ
 from pathlib import Path
 
+# Read .env into os.environ once per process; re-imports (test runners,
+# reloaders) see the marker and skip re-parsing the file.
+if not os.environ.get("_SD_DOTENV_LOADED"):
+    load_dotenv()
+    os.environ["_SD_DOTENV_LOADED"] = "1"
+
 
 # ── Database ────────────────────────────────────────────────────────────────
 DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -23,7 +28,7 @@ if not DB_USER or not DB_PASS:
 
 
 # ── Editions ────────────────────────────────────────────────────────────────
-RAW_ALLOWED = {"4", "5", "6", "SR4", "SR5", "SR6"}
+RAW_ALLOWED = frozenset({"4", "5", "6", "SR4", "SR5", "SR6"})
 ALLOWED_EDITIONS = "SR4, SR5, SR6 (or drop the SR prefix)"
 DEFAULT_EDITION = "SR5"
 
@@ -69,5 +74,8 @@ if not TELEGRAM_TOKEN:
 DISCORD_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 if not DISCORD_TOKEN:
     raise RuntimeError("Missing DISCORD_BOT_TOKEN environment variable")
+# "1" (default): sync slash commands globally once at startup (production).
+# "0": sync them to each guild on ready/join instead, which applies instantly (development).
+DISCORD_SYNC_GLOBAL = os.getenv("DISCORD_SYNC_GLOBAL", "1") != "0"
 DISCORD_TEST_GUILD_ID = "1337320915897421866"
 DISCORD_LOG_CHANNEL_ID = "1367768041198456872"
\ No newline at end of file
@@ -5,23 +5,180 @@ Database connection and CRUD operations for user and chat settings.
 These functions handle initializing default settings and getting/setting
 Shadowrun edition preferences for users and chats.
 """
-import mysql.connector
-from typing import Any, Dict, Literal, Optional, cast
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from cachetools import TTLCache
+from mysql.connector import pooling
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple, cast
 from shadowsprite.config import DB_HOST, DB_NAME, DB_USER, DB_PASS, DEFAULT_EDITION
 
+# Shared connection pool: checking out an open connection avoids paying the
+# TCP/TLS/auth handshake on every CRUD call. Every write is a single
+# statement, so autocommit saves the separate COMMIT round-trip.
+POOL_SIZE = 16
+POOL = pooling.MySQLConnectionPool(
+    pool_name="sd",
+    pool_size=POOL_SIZE,
+    host=DB_HOST,
+    database=DB_NAME,
+    user=DB_USER,
+    password=DB_PASS,
+    autocommit=True
+)
+
+# In-process edition caches: editions only change through set_*_edition, so
+# repeated rolls in the same user/chat skip the database entirely. The TTL
+# bounds staleness for rows edited outside this process. The lock guards the
+# caches for callers running in asyncio.to_thread workers.
+EDITION_CACHE_SIZE = 4096
+EDITION_CACHE_TTL = 600    # seconds
+_user_edition_cache: TTLCache = TTLCache(maxsize=EDITION_CACHE_SIZE, ttl=EDITION_CACHE_TTL)
+_chat_edition_cache: TTLCache = TTLCache(maxsize=EDITION_CACHE_SIZE, ttl=EDITION_CACHE_TTL)
+_edition_cache_lock = threading.Lock()
+
+def _cached_edition(cache: TTLCache, key: int) -> Optional[str]:
+    """
+    Return a cached edition, or None if it is missing or expired.
+    """
+    with _edition_cache_lock:
+        return cache.get(key)
+
+def _cache_edition(cache: TTLCache, key: int, edition: str) -> None:
+    """
+    Store an edition in a cache; the cache evicts expired/LRU entries itself.
+    """
+    with _edition_cache_lock:
+        cache[key] = edition
+
+# Global NPC template list. Templates are created outside the bot, so a short
+# TTL is enough to pick up new ones without querying on every listing.
+TEMPLATES_CACHE_TTL = 30    # seconds
+_TEMPLATES_CACHE_KEY = "npc_templates_global"
+_templates_cache: TTLCache = TTLCache(maxsize=64, ttl=TEMPLATES_CACHE_TTL)
+_templates_cache_lock = threading.Lock()
+
+# Known template aliases, loaded lazily on first lookup. Misses fall back to
+# the database so templates added outside the bot are still found.
+_template_aliases: Optional[Set[str]] = None
+_template_aliases_lock = threading.Lock()
+
+# Connection shared by every CRUD call made inside one `db_session()` block.
+# Holds a one-slot dict so the lazily checked-out connection is visible to
+# copies of the context as well.
+_session_db: ContextVar[Optional[Dict[str, Any]]] = ContextVar("_session_db", default=None)
+
+# POOL.get_connection() raises PoolError instead of waiting when the pool is
+# empty, so sessions queue here for a slot first. One connection is left for
+# the plain synchronous CRUD calls made on the event loop thread: they never
+# await while holding it, so they use at most one at a time.
+_db_slots = asyncio.Semaphore(POOL_SIZE - 1)
+
+@asynccontextmanager
+async def db_session():
+    """
+    Share a single pooled connection across several CRUD calls made while
+    handling one bot update.
+
+    The connection is only checked out once a call actually needs the
+    database, and is handed back to the pool when the block exits, so the
+    block should not span replies or other network awaits. Blocks wait for
+    a free pool slot rather than failing when the pool is busy.
+    """
+    async with _db_slots:
+        session: Dict[str, Any] = {"db": None}
+        token = _session_db.set(session)
+        try:
+            yield
+        finally:
+            _session_db.reset(token)
+            if session["db"] is not None:
+                session["db"].close()
+
 def get_db():
     """
-    Create and return a new MySQL database connection using configuration.
+    Check out a MySQL connection from the shared pool.
+
+    Inside a `db_session()` block the session's connection is returned
+    instead. Callers must hand the connection back with `release_db()`.
 
     Returns:
-        mysql.connector.connection.MySQLConnection: A new database connection.
+        mysql.connector.pooling.PooledMySQLConnection: A pooled database connection.
+    """
+    session = _session_db.get()
+    if session is None:
+        return POOL.get_connection()
+    if session["db"] is None:
+        session["db"] = POOL.get_connection()
+    return session["db"]
+
+def release_db(db) -> None:
+    """
+    Return a connection obtained from `get_db()` to the pool, unless it is
+    owned by the active `db_session()` (which releases it on exit).
+
+    Args:
+        db: Connection previously returned by `get_db()`.
+    """
+    session = _session_db.get()
+    if session is None or session["db"] is not db:
+        db.close()
+
+def _fetch(sql: str, params: Tuple[Any, ...], one: bool):
+    """
+    Blocking helper behind `fetch_one()` / `fetch_all()`.
+    """
+    db = get_db()
+    cur = db.cursor()
+    try:
+        cur.execute(sql, params)
+        return cur.fetchone() if one else cur.fetchall()
+    finally:
+        cur.close()
+        release_db(db)
+
+async def _run_fetch(sql: str, params: Tuple[Any, ...], one: bool):
+    """
+    Run `_fetch()` in a worker thread. Outside a `db_session()` the worker
+    checks out its own connection, so it first waits for a pool slot: with
+    updates handled concurrently per chat, many workers can be in flight.
+    """
+    if _session_db.get() is not None:
+        return await asyncio.to_thread(_fetch, sql, params, one)
+    async with _db_slots:
+        return await asyncio.to_thread(_fetch, sql, params, one)
+
+async def fetch_one(sql: str, params: Tuple[Any, ...] = ()) -> Optional[Tuple[Any, ...]]:
     """
-    return mysql.connector.connect(
-        host=DB_HOST,
-        database=DB_NAME,
-        user=DB_USER,
-        password=DB_PASS
-    )
+    Run a query in a worker thread and return its first row, so the
+    blocking driver call does not stall the event loop.
+
+    The worker runs in a copy of the caller's context, so it shares the
+    connection of an active `db_session()`; otherwise it waits for a free
+    pool slot before checking one out.
+
+    Args:
+        sql (str): Query with %s placeholders.
+        params (tuple): Query parameters.
+
+    Returns:
+        Optional[tuple]: The first row, or None if there is none.
+    """
+    return await _run_fetch(sql, params, True)
+
+async def fetch_all(sql: str, params: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+    """
+    Run a query in a worker thread and return all rows (see `fetch_one()`).
+
+    Args:
+        sql (str): Query with %s placeholders.
+        params (tuple): Query parameters.
+
+    Returns:
+        List[tuple]: All result rows.
+    """
+    return await _run_fetch(sql, params, False)
 
 def add_npc(
     user_id: int,
@@ -42,44 +199,8 @@ def add_npc(
     :returns: new npc_id
     """
     db = get_db()
-    cur = db.cursor(dictionary=True)
-    tmpl_alias = npc_args.get('template')
-    if tmpl_alias:
-        # 1) Fetch the template row
-        cur.execute(
-            "SELECT * FROM npcs WHERE alias = %s AND template = 1",
-            (tmpl_alias,)
-        )
-        template_row_raw = cur.fetchone()
-        if not template_row_raw:
-            raise ValueError(f"No template found with alias '{tmpl_alias}'")
-
-        template_row: Dict[str, Any] = cast(Dict[str, Any], template_row_raw)
-        # 2) Prepare the data to clone
-        # List all columns you want to carry over from the template:
-        clone_cols = [
-            'edition',           # example columns...
-            'body','agility','reaction','strength','willpower',
-            'logic','intuition','charisma','essence',
-            'initiative','initiative_dice','physical_monitor',
-            'stun_monitor','physical_limit','mental_limit',
-            'social_limit','armor',
-            'augmentations','gear','abilities','other'
-        ]
-        # Build the INSERT column list and values
-        cols = ['owner_user_id','owner_chat_id','name','alias','template','is_unique','shared'] + clone_cols
-        vals = [
-            user_id,
-            chat_id,
-            npc_args['name'],
-            npc_args.get('alias'),
-            0,                                        # new NPC is not itself a template
-            1 if npc_args.get('is_unique') else 0,
-            1 if npc_args.get('shared') else 0,
-        ] + [ template_row[col] for col in clone_cols ]
-
-    else:
-        # No template: insert only the minimal fields
+    cur = db.cursor()
+    try:
         cols = [
             'owner_user_id','owner_chat_id','name','alias',
             'template','is_unique','shared'
@@ -89,66 +210,158 @@ def add_npc(
             chat_id,
             npc_args['name'],
             npc_args.get('alias'),
-            0,  # template flag off
+            0,                                        # new NPC is not itself a template
             1 if npc_args.get('is_unique') else 0,
-            1 if npc_args.get('shared') else 0
+            1 if npc_args.get('shared') else 0,
         ]
+        placeholders = ", ".join(["%s"] * len(vals))
+        tmpl_alias = npc_args.get('template')
+        if tmpl_alias:
+            # 1) Clone the template row server-side in a single INSERT ... SELECT
+            # List all columns you want to carry over from the template:
+            clone_cols = [
+                'edition',           # example columns...
+                'body','agility','reaction','strength','willpower',
+                'logic','intuition','charisma','essence',
+                'initiative','initiative_dice','physical_monitor',
+                'stun_monitor','physical_limit','mental_limit',
+                'social_limit','armor',
+                'augmentations','gear','abilities','other'
+            ]
+            col_sql = ", ".join(cols + clone_cols)
+            sql = (
+                f"INSERT INTO npcs ({col_sql}) "
+                f"SELECT {placeholders}, {', '.join(clone_cols)} "
+                "FROM npcs WHERE alias = %s AND template = 1"
+            )
+            cur.execute(sql, vals + [tmpl_alias])
+            if cur.rowcount == 0:
+                # The template was removed since its alias was cached
+                with _template_aliases_lock:
+                    if _template_aliases is not None:
+                        _template_aliases.discard(tmpl_alias)
+                raise ValueError(f"No template found with alias '{tmpl_alias}'")
+        else:
+            # 2) No template: insert only the minimal fields
+            col_sql = ", ".join(cols)
+            sql = f"INSERT INTO npcs ({col_sql}) VALUES ({placeholders})"
+            cur.execute(sql, vals)
 
-    # 3) Build and execute the INSERT
-    col_sql = ", ".join(cols)
-    placeholders = ", ".join(["%s"] * len(vals))
-    sql = f"INSERT INTO npcs ({col_sql}) VALUES ({placeholders})"
-    cur.execute(sql, vals)
-    db.commit()
-
-    # 4) Return the new npc_id
-    new_id = cur.lastrowid
+        # 3) Return the new npc_id
+        new_id = cur.lastrowid
+    finally:
+        cur.close()
+        release_db(db)
     assert new_id is not None, "Failed to retrieve new NPC ID"
     return new_id
 
-def init_user_settings(user_id: int) -> None:
+async def get_templates() -> Tuple[Tuple[str, Optional[str]], ...]:
     """
-    Ensure a default user_settings row exists for the given user.
-    Inserts a record with default edition 'SR5' if none exists.
+    Return every NPC template as (name, alias) pairs, cached for a few seconds.
+    Only a cache miss queries the database (in a worker thread).
+
+    Returns:
+        Tuple[Tuple[str, Optional[str]], ...]: Template names and aliases;
+        shared between callers, so it must not be mutated.
+    """
+    with _templates_cache_lock:
+        rows = _templates_cache.get(_TEMPLATES_CACHE_KEY)
+    if rows is None:
+        rows = tuple(await fetch_all("SELECT name, alias FROM npcs WHERE template = 1"))
+        with _templates_cache_lock:
+            _templates_cache[_TEMPLATES_CACHE_KEY] = rows
+    return rows
+
+async def template_alias_exists(alias: str) -> bool:
+    """
+    Check whether a template with the given alias exists.
+
+    Known aliases are answered from an in-process set; only unknown aliases
+    (or the first lookup, which loads the set) query the database, in a
+    worker thread.
 
     Args:
-        user_id (int): Telegram user ID to initialize settings for.
+        alias (str): Template alias to look up.
+
+    Returns:
+        bool: True if a template with this alias exists.
+    """
+    global _template_aliases
+    with _template_aliases_lock:
+        if _template_aliases is not None and alias in _template_aliases:
+            return True
+        loaded = _template_aliases is not None
+
+    if not loaded:
+        rows = await fetch_all("SELECT alias FROM npcs WHERE template = 1 AND alias IS NOT NULL")
+        aliases = {row[0] for row in rows}
+        with _template_aliases_lock:
+            _template_aliases = aliases
+        return alias in aliases
+    found = await fetch_one("SELECT 1 FROM npcs WHERE alias = %s AND template = 1", (alias,)) is not None
+    if found:
+        with _template_aliases_lock:
+            if _template_aliases is not None:
+                _template_aliases.add(alias)
+    return found
+
+def _init_user_settings(cur, user_id: int) -> None:
+    """
+    Insert a default user_settings row on an open cursor, unless one exists.
     """
-    db = get_db()
-    cur = db.cursor()
     cur.execute(
         """
         INSERT INTO user_settings (user_id, edition)
         VALUES (%s, %s)
         ON DUPLICATE KEY UPDATE user_id = user_id
-        """, 
+        """,
         (user_id, DEFAULT_EDITION))
-    db.commit()
-    cur.close()
-    db.close()
 
-def init_chat_settings(chat_id: int) -> None:
+def init_user_settings(user_id: int) -> None:
     """
-    Ensure a default chat_settings row exists for the given chat.
+    Ensure a default user_settings row exists for the given user.
     Inserts a record with default edition 'SR5' if none exists.
 
     Args:
-        chat_id (int): Telegram chat ID to initialize settings for.
+        user_id (int): Telegram user ID to initialize settings for.
     """
     db = get_db()
     cur = db.cursor()
+    try:
+        _init_user_settings(cur, user_id)
+    finally:
+        cur.close()
+        release_db(db)
+
+def _init_chat_settings(cur, chat_id: int) -> None:
+    """
+    Insert a default chat_settings row on an open cursor, unless one exists.
+    """
     cur.execute(
         """
         INSERT INTO chat_settings (chat_id, edition)
         VALUES (%s, %s)
         ON DUPLICATE KEY UPDATE chat_id = chat_id
-        """, 
+        """,
         (chat_id, DEFAULT_EDITION))
-    db.commit()
-    cur.close()
-    db.close()
 
-def get_user_edition(user_id: int) -> str:
+def init_chat_settings(chat_id: int) -> None:
+    """
+    Ensure a default chat_settings row exists for the given chat.
+    Inserts a record with default edition 'SR5' if none exists.
+
+    Args:
+        chat_id (int): Telegram chat ID to initialize settings for.
+    """
+    db = get_db()
+    cur = db.cursor()
+    try:
+        _init_chat_settings(cur, chat_id)
+    finally:
+        cur.close()
+        release_db(db)
+
+def _get_user_edition_db(user_id: int) -> str:
     """
     Retrieve the stored edition for a user, inserting a default if missing.
 
@@ -159,20 +372,37 @@ def get_user_edition(user_id: int) -> str:
         str: The user's preferred Shadowrun edition (e.g. 'SR5').
     """
     db = get_db()
-    cur = db.cursor(dictionary=True)
-    cur.execute("SELECT edition FROM user_settings WHERE user_id = %s", (user_id,))
-    row = cur.fetchone()
-    cur.close()
-    db.close()
-    if row:
-        edition = cast(dict[str, Any], row)['edition']
-        return edition
-    
-    # Initialize default if not found
-    init_user_settings(user_id)
-    return DEFAULT_EDITION
+    cur = db.cursor()
+    try:
+        cur.execute("SELECT edition FROM user_settings WHERE user_id = %s", (user_id,))
+        row = cur.fetchone()
+        if row:
+            return cast(str, row[0])
 
-def get_chat_edition(chat_id: int) -> str:
+        # Initialize default if not found, reusing this connection
+        _init_user_settings(cur, user_id)
+        return DEFAULT_EDITION
+    finally:
+        cur.close()
+        release_db(db)
+
+def get_user_edition(user_id: int) -> str:
+    """
+    Return the user's edition, served from the in-process cache when possible.
+
+    Args:
+        user_id (int): Telegram user ID.
+
+    Returns:
+        str: The user's preferred Shadowrun edition (e.g. 'SR5').
+    """
+    edition = _cached_edition(_user_edition_cache, user_id)
+    if edition is None:
+        edition = _get_user_edition_db(user_id)
+        _cache_edition(_user_edition_cache, user_id, edition)
+    return edition
+
+def _get_chat_edition_db(chat_id: int) -> str:
     """
     Retrieve the stored edition for a chat, inserting a default if missing.
 
@@ -183,18 +413,35 @@ def get_chat_edition(chat_id: int) -> str:
         str: The chat's preferred Shadowrun edition (e.g. 'SR5').
     """
     db = get_db()
-    cur = db.cursor(dictionary=True)
-    cur.execute("SELECT edition FROM chat_settings WHERE chat_id = %s", (chat_id,))
-    row = cur.fetchone()
-    cur.close()
-    db.close()
-    if row:
-        edition = cast(dict[str, Any], row)['edition']
-        return edition
-    
-    # Initialize default if not found
-    init_chat_settings(chat_id)
-    return DEFAULT_EDITION
+    cur = db.cursor()
+    try:
+        cur.execute("SELECT edition FROM chat_settings WHERE chat_id = %s", (chat_id,))
+        row = cur.fetchone()
+        if row:
+            return cast(str, row[0])
+
+        # Initialize default if not found, reusing this connection
+        _init_chat_settings(cur, chat_id)
+        return DEFAULT_EDITION
+    finally:
+        cur.close()
+        release_db(db)
+
+def get_chat_edition(chat_id: int) -> str:
+    """
+    Return the chat's edition, served from the in-process cache when possible.
+
+    Args:
+        chat_id (int): Telegram chat or group ID.
+
+    Returns:
+        str: The chat's preferred Shadowrun edition (e.g. 'SR5').
+    """
+    edition = _cached_edition(_chat_edition_cache, chat_id)
+    if edition is None:
+        edition = _get_chat_edition_db(chat_id)
+        _cache_edition(_chat_edition_cache, chat_id, edition)
+    return edition
 
 def set_user_edition(user_id: int, edition: str) -> None:
     """
@@ -206,17 +453,19 @@ def set_user_edition(user_id: int, edition: str) -> None:
     """
     db = get_db()
     cur = db.cursor()
-    cur.execute(
-        """
-        INSERT INTO user_settings (user_id, edition)
-        VALUES (%s, %s)
-        ON DUPLICATE KEY UPDATE edition = VALUES(edition)
-        """,
-        (user_id, edition)
-    )
-    db.commit()
-    cur.close()
-    db.close()
+    try:
+        cur.execute(
+            """
+            INSERT INTO user_settings (user_id, edition)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE edition = VALUES(edition)
+            """,
+            (user_id, edition)
+        )
+    finally:
+        cur.close()
+        release_db(db)
+    _cache_edition(_user_edition_cache, user_id, edition)
 
 def set_chat_edition(chat_id: int, edition: str) -> None:
     """
@@ -228,17 +477,19 @@ def set_chat_edition(chat_id: int, edition: str) -> None:
     """
     db = get_db()
     cur = db.cursor()
-    cur.execute(
-        """
-        INSERT INTO chat_settings (chat_id, edition)
-        VALUES (%s, %s)
-        ON DUPLICATE KEY UPDATE edition = VALUES(edition)
-        """,
-        (chat_id, edition)
-    )
-    db.commit()
-    cur.close()
-    db.close()
+    try:
+        cur.execute(
+            """
+            INSERT INTO chat_settings (chat_id, edition)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE edition = VALUES(edition)
+            """,
+            (chat_id, edition)
+        )
+    finally:
+        cur.close()
+        release_db(db)
+    _cache_edition(_chat_edition_cache, chat_id, edition)
 
 def get_edition(
     user_id: int,
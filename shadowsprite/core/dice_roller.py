@@ -7,11 +7,34 @@ wave-based (Rule of Six) dice pool rolling, and computation of roll results
 including hits, net hits, outcome, and glitch detection.
 """
 import random
+from collections import Counter
+from itertools import chain
 from typing import Dict, Any, List, Optional, Tuple
 
 RollArgs = Tuple[int, bool, Optional[int], Optional[int], str]
 # (dice_pool, edge, limit, threshold, comment)
 
+# Difficulty keyword -> threshold, per edition (SR6 has no keywords)
+_SR4_THRESHOLDS: Dict[str, int] = {
+    "easy": 1, "ea": 1,
+    "average": 2, "av": 2,
+    "hard": 4, "ha": 4,
+    "extreme": 6, "ex": 6,
+}
+_SR5_THRESHOLDS: Dict[str, int] = {
+    "easy": 1, "ea": 1,
+    "average": 2, "av": 2,
+    "hard": 4, "ha": 4,
+    "veryhard": 6, "vh": 6,
+    "extreme": 8, "ex": 8,
+}
+_EDITION_THRESHOLDS: Dict[str, Dict[str, int]] = {
+    "SR4": _SR4_THRESHOLDS,
+    "SR5": _SR5_THRESHOLDS,
+}
+
+_DIE_FACES = (1, 2, 3, 4, 5, 6)
+
 def parse_threshold(keyword: str, edition: str = "SR5") -> Optional[int]:
     """
     Map a difficulty keyword to its numeric threshold based on the Shadowrun edition.
@@ -24,26 +47,10 @@ def parse_threshold(keyword: str, edition: str = "SR5") -> Optional[int]:
         The numeric threshold corresponding to the keyword, or None if not recognized
         or unsupported for the given edition.
     """
-    key = keyword.lower().replace(" ", "")
-    if edition == "SR4":
-        thresholdmap = {
-            "easy": 1, "ea": 1,
-            "average": 2, "av": 2,
-            "hard": 4, "ha": 4,
-            "extreme": 6, "ex": 6,
-        }
-    elif edition == "SR5":
-        thresholdmap = {
-            "easy": 1, "ea": 1,
-            "average": 2, "av": 2,
-            "hard": 4, "ha": 4,
-            "veryhard": 6, "vh": 6,
-            "extreme": 8, "ex": 8,
-        }
-    else:
+    thresholdmap = _EDITION_THRESHOLDS.get(edition)
+    if thresholdmap is None:
         return None
-
-    return thresholdmap.get(key)
+    return thresholdmap.get(keyword.lower().replace(" ", ""))
 
 def parse_roll_args(
     raw_args: list[str], 
@@ -64,24 +71,25 @@ def parse_roll_args(
           - threshold: Optional target hits for success.
           - comment: Remaining text as user comment.
     """
-    args = raw_args[:]
     # 1) Dice & edge flag
-    raw = args.pop(0)
+    raw = raw_args[0]
+    i = 1
     edge = False
-    if raw.lower().endswith("e"):
+    if raw[-1:] in ("e", "E"):
         edge = True
         raw = raw[:-1]
     dice_pool = int(raw)
     # 2) Limit (SR5 only)
     limit = None
-    if edition == "SR5" and args and args[0].isdigit():
-        limit = int(args.pop(0))
+    if edition == "SR5" and i < len(raw_args) and raw_args[i].isdigit():
+        limit = int(raw_args[i])
+        i += 1
     # 3) Threshold based on edition rules
     threshold = None
-    if args:
-        token = args[0]
+    if i < len(raw_args):
+        token = raw_args[i]
         # SR5: allow 't'-prefixed int
-        if edition == "SR5" and token.lower().startswith("t"):
+        if edition == "SR5" and token[:1] in ("t", "T"):
             token = token[1:]
         # If digit accept as threshold
         if token.isdigit():
@@ -91,9 +99,9 @@ def parse_roll_args(
             threshold = parse_threshold(token, edition)
         # If valid threshold, move to next arg
         if threshold is not None:
-            args.pop(0)
+            i += 1
     #  4) Remainder is comment
-    comment = " ".join(args).strip()
+    comment = " ".join(raw_args[i:]).strip()
     return dice_pool, edge, limit, threshold, comment
 
 def roll_dicepool(
@@ -115,11 +123,11 @@ def roll_dicepool(
     rolls_by_wave: List[List[int]] = []
     pool = num_dice
     while pool > 0:
-        wave = random.choices([1, 2, 3, 4, 5, 6], k=pool)
+        wave = random.choices(_DIE_FACES, k=pool)
         rolls_by_wave.append(wave)
         if edge:
             # reroll the 6s
-            pool = sum(1 for d in wave if d == 6)
+            pool = wave.count(6)
         else:
             pool = 0
     return rolls_by_wave
@@ -151,10 +159,11 @@ def get_roll_results(
     """
     # 1) roll waves
     waves = roll_dicepool(num_dice, edge)
-    # 2) flatten for counts
-    all_rolls = [d for wave in waves for d in wave]
-    raw_hits = sum(1 for d in all_rolls if d >= 5)
-    ones = sum(1 for d in all_rolls if d == 1)
+    # 2) tally faces in a single pass
+    faces = Counter(chain.from_iterable(waves))
+    total = sum(faces.values())
+    raw_hits = faces[5] + faces[6]
+    ones = faces[1]
     # 3) apply limit (only SR5)
     if edition == "SR5" and limit is not None:
         hits = min(raw_hits, limit)
@@ -173,7 +182,7 @@ def get_roll_results(
         else:
             outcome = "Success!"
     # 6) determine glitch
-    if ones >= len(all_rolls)/2:
+    if ones >= total/2:
         glitch = "Glitch" if hits > 0 else "Critical Glitch"
     else:
         glitch = ""
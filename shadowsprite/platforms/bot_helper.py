@@ -6,9 +6,21 @@ Includes MarkdownV2 escaping, die formatting, line grouping, and full response f
 """
 
 import re
-from typing import Dict, Any, List
+from collections import Counter
+from typing import Dict, Any, List, Tuple
 from shadowsprite.config import BOT_USAGE_PROMPT
 
+# MarkdownV2-reserved characters mapped to their backslash-escaped form
+_TG_MDV2_TABLE = str.maketrans({c: "\\" + c for c in r"\_*[]()~`>#+-=|{}.! "})
+
+# /npc_create options: -a ALIAS, -t TEMPLATE, -u (unique), -s (shared).
+# Leading whitespace is consumed so removing a flag leaves single spaces.
+_NPC_FLAGS_RE = re.compile(r"(?:^|\s+)(?:-a\s+(\S+)|-t\s+(\S+)|(-u)|(-s))(?=\s|$)")
+
+# Formatted die tokens indexed by face value (index 0 unused)
+_DISCORD_DIE = ("", "~~1~~", "2", "3", "4", "__5__", "__6__")
+_TELEGRAM_DIE = ("", "~1~", "2", "3", "4", "__5__", "__6__")
+
 
 def discord_send_error(ctx, message=BOT_USAGE_PROMPT):
     return ctx.send(f"❌ {message}")
@@ -27,11 +39,7 @@ def format_die_discord(d: int) -> str:
           - Ones are struck through (e.g. '~~1~~').
           - All other results are plain text.
     """
-    if d >= 5:
-        return f"__{d}__"
-    if d == 1:
-        return f"~~{d}~~"
-    return str(d)
+    return _DISCORD_DIE[d]
 
 
 def format_die_telegram(d: int) -> str:
@@ -47,11 +55,25 @@ def format_die_telegram(d: int) -> str:
           - Ones are struck through (e.g. '~1~').
           - All other results are plain text.
     """
-    if d >= 5:
-        return f"__{d}__"
-    if d == 1:
-        return f"~{d}~"
-    return str(d)
+    return _TELEGRAM_DIE[d]
+
+
+def _die_tokens_desc(wave: List[int], die_tokens: Tuple[str, ...]) -> List[str]:
+    """
+    Format a wave's dice highest-first using a counting sort (faces are 1..6).
+
+    Args:
+        wave:       Die results for one wave.
+        die_tokens: Formatted token per face value (_DISCORD_DIE or _TELEGRAM_DIE).
+
+    Returns:
+        The formatted tokens ordered from 6 down to 1.
+    """
+    counts = Counter(wave)
+    tokens: List[str] = []
+    for face in (6, 5, 4, 3, 2, 1):
+        tokens += [die_tokens[face]] * counts[face]
+    return tokens
 
 
 def group_into_lines(
@@ -72,21 +94,16 @@ def group_into_lines(
         with a visual spacer every `spacer_every` tokens.
     """
     lines: List[str] = []
-    line = ""
-
-    for i, tok in enumerate(tokens):
-        # insert a visual spacer after every `spacer_every` tokens
-        if i > 0 and i % spacer_every == 0:
-            line += "   "
-        # append this token and a space
-        line += tok + " "
-        # if we've reached `per_line` tokens, commit this line
-        if (i + 1) % per_line == 0:
-            lines.append(line.strip())
-            line = ""
-    # any remaining tokens go on a final line
-    if line:
-        lines.append(line.strip())
+
+    for start in range(0, len(tokens), per_line):
+        line: List[str] = []
+        for i, tok in enumerate(tokens[start:start + per_line], start):
+            # insert a visual spacer after every `spacer_every` tokens
+            if i > start and i % spacer_every == 0:
+                line.append("  ")
+            line.append(tok)
+        # commit this line in a single join
+        lines.append(" ".join(line))
     return lines
 
 
@@ -114,7 +131,7 @@ def format_for_discord(data, edition: str, edge: bool, comment: str) -> str:
     wave_blocks = []
     for wave in data["waves"]:
         # sort descending and format each die
-        tokens = [format_die_discord(d) for d in sorted(wave, reverse=True)]
+        tokens = _die_tokens_desc(wave, _DISCORD_DIE)
         # group into readable lines
         lines = group_into_lines(tokens)
         wave_blocks.append("\n".join(lines))
@@ -174,14 +191,14 @@ def format_for_telegram(
     # 2) Header with edition & edge tag
     header = f"🎲 *{edition} Rolls:*"
     if edge:
-        header += f" {markdown_escape_telegram('(Using edge!)')}"
+        header += f" {_TG_EDGE_TAG}"
     parts.append(header)
    
     # 3) Roll waves formatted into blocks
     wave_blocks = []
     for wave in data["waves"]:
         # sort descending and format each die
-        tokens = [format_die_telegram(d) for d in sorted(wave, reverse=True)]
+        tokens = _die_tokens_desc(wave, _TELEGRAM_DIE)
         # group into readable lines
         lines = group_into_lines(tokens)
         wave_blocks.append("\n".join(lines))
@@ -197,18 +214,15 @@ def format_for_telegram(
 
     # 5) Net Hits & outcome (if threshold was used)
     if data.get("net_hits") is not None:
-        parts.append(markdown_escape_telegram(f"🎯Net Hits: {data['net_hits']}"))
-        parts.append(f"*{markdown_escape_telegram(data.get('outcome', ''))}*")
+        parts.append(_TG_NET_HITS + markdown_escape_telegram(str(data['net_hits'])))
+        outcome = data.get('outcome', '')
+        parts.append(f"*{_TG_OUTCOMES.get(outcome) or markdown_escape_telegram(outcome)}*")
 
     # 6) Glitch / Critical Glitch
     glitch_message = data.get("glitch")      # e.g. "Glitch" or "Critical Glitch"
     if glitch_message:
-        # Pick the right emoji
-        emoji = "💀" if "Critical" in glitch_message else "😵"
-        # Build the full raw text, including the "!" suffix
-        raw = f"{emoji} {glitch_message + '!'} {emoji}"
-        # Escape *everything* (emoji are untouched, hyphens etc. get backslashes)
-        parts.append(markdown_escape_telegram(raw))
+        # Pre-escaped line with the matching emoji and "!" suffix
+        parts.append(_TG_GLITCHES[glitch_message])
 
     # join all with newlines
     return "\n\n".join(parts)
@@ -224,8 +238,20 @@ def markdown_escape_telegram(text):
     Returns:
         A new string with all MarkdownV2-reserved characters backslash-escaped.
     """
-    escape_chars = r"\_*[]()~`>#+-=|{}.! "
-    return ''.join(f"\\{c}" if c in escape_chars else c for c in text)
+    return text.translate(_TG_MDV2_TABLE)
+
+
+# Static Telegram fragments, escaped once at import rather than per roll
+_TG_EDGE_TAG = markdown_escape_telegram("(Using edge!)")
+_TG_NET_HITS = markdown_escape_telegram("🎯Net Hits: ")
+_TG_OUTCOMES = {
+    outcome: markdown_escape_telegram(outcome)
+    for outcome in ("Success!", "Failure!", "Critical Success!")
+}
+_TG_GLITCHES = {
+    "Glitch": markdown_escape_telegram("😵 Glitch! 😵"),
+    "Critical Glitch": markdown_escape_telegram("💀 Critical Glitch! 💀"),
+}
 
 
 def parse_npc_create_telegram(args_text: str) -> dict:
@@ -239,46 +265,33 @@ def parse_npc_create_telegram(args_text: str) -> dict:
     Returns a dictionary with parsed fields.
     """
     # Default values
-    alias = None
-    template = None
-    is_unique = False
-    shared = False
-
-    # Patterns for -a alias and -t template
-    alias_match = re.search(r'-a\s+(\S+)', args_text)
-    if alias_match:
-        alias = alias_match.group(1)
-        # Remove the matched alias argument from text
-        args_text = args_text[:alias_match.start()] + args_text[alias_match.end():]
-
-    template_match = re.search(r'-t\s+(\S+)', args_text)
-    if template_match:
-        template = template_match.group(1)
-        # Remove the matched template argument from text
-        args_text = args_text[:template_match.start()] + args_text[template_match.end():]
-
-    # Check for -u and -s flags
-    if re.search(r'(\s|^)-u(\s|$)', args_text):
-        is_unique = True
-        # Remove -u flag
-        args_text = re.sub(r'(\s|^)-u(\s|$)', ' ', args_text)
-
-    if re.search(r'(\s|^)-s(\s|$)', args_text):
-        shared = True
-        # Remove -s flag
-        args_text = re.sub(r'(\s|^)-s(\s|$)', ' ', args_text)
+    parsed: Dict[str, Any] = {
+        'alias': None,
+        'template': None,
+        'is_unique': False,
+        'shared': False,
+    }
+
+    # Collect every flag and strip it from the text in a single scan
+    def take_flag(match: re.Match) -> str:
+        alias, template, unique, shared = match.groups()
+        if alias is not None:
+            parsed['alias'] = parsed['alias'] or alias
+        elif template is not None:
+            parsed['template'] = parsed['template'] or template
+        elif unique:
+            parsed['is_unique'] = True
+        elif shared:
+            parsed['shared'] = True
+        return ""
+
+    args_text = _NPC_FLAGS_RE.sub(take_flag, args_text)
 
     # The rest is the name (trim spaces and quotes)
     name = args_text.strip().strip('"').strip("'")
 
     # Return the result
-    return {
-        'name': name,
-        'alias': alias,
-        'template': template,
-        'is_unique': is_unique,
-        'shared': shared,
-    }
+    return {'name': name, **parsed}
 
 # ----------------------
 # Example usage / tests:
@@ -13,6 +13,9 @@ Includes handlers for:
   - start:
 """
 
+import logging
+import time
+from typing import Dict
 import discord
 from discord.ext import commands
 from discord import app_commands, Member, Object
@@ -22,6 +25,7 @@ from shadowsprite.config import (
     RAW_ALLOWED,
     BOT_USAGE_PROMPT,
     HELP_TEXT,
+    DISCORD_SYNC_GLOBAL,
     DISCORD_TEST_GUILD_ID,
 )
 from shadowsprite.core.db_crud import (
@@ -31,7 +35,9 @@ from shadowsprite.core.db_crud import (
 )
 from shadowsprite.core.dice_roller import parse_roll_args, get_roll_results
 from shadowsprite.platforms.bot_helper import format_for_discord
-from shadowsprite.utils.error_handler import report_discord_error
+from shadowsprite.utils.error_handler import init_error_handler, report_discord_error
+
+logger = logging.getLogger(__name__)
 
 # --- Configure intents (no message content needed for slash commands) ---
 intents = discord.Intents.default()
@@ -47,15 +53,41 @@ class ShadowSprite(commands.Bot):
         #self.tree.clear_commands(guild=guild)
         #await self.tree.sync(guild=guild)
 
-        # Sync globally
-        await self.tree.sync()
+        # Sync globally (otherwise each guild is synced on ready/join)
+        if DISCORD_SYNC_GLOBAL:
+            await self.tree.sync()
 
 
 bot = ShadowSprite()
 
+# Guilds whose commands were synced by this process, with the sync time;
+# on_ready fires again on every reconnect.
+_synced_guilds: Dict[int, float] = {}
+
+async def sync_guild_commands(guild: discord.abc.Snowflake):
+    """
+    Copy the global slash commands to a guild and sync them there, which
+    takes effect immediately. Guilds already synced are skipped; a guild
+    that rejects the sync (e.g. missing the applications.commands scope)
+    is logged and retried on the next ready/join.
+    """
+    if guild.id in _synced_guilds:
+        return
+    bot.tree.copy_global_to(guild=guild)
+    try:
+        await bot.tree.sync(guild=guild)
+    except discord.HTTPException:
+        logger.exception("Failed to sync slash commands to guild %d", guild.id)
+        return
+    _synced_guilds[guild.id] = time.monotonic()
+
 @bot.event
 async def on_ready():
     print(f"Discord bot ready as {bot.user}")
+    init_error_handler(bot)
+    if not DISCORD_SYNC_GLOBAL:
+        for guild in bot.guilds:
+            await sync_guild_commands(guild)
 
 @bot.event
 async def on_guild_join(guild: discord.Guild):
@@ -70,6 +102,8 @@ async def on_guild_join(guild: discord.Guild):
             f"Hello! I’ve initialized this server’s edition to **{edition}**."
             f"\nUse `/ed <edition>` to change it."
         )
+    if not DISCORD_SYNC_GLOBAL:
+        await sync_guild_commands(guild)
 
 
 # ---------------- Slash Commands ----------------
@@ -125,6 +159,10 @@ async def roll_alias(interaction: discord.Interaction, expression: str):
     await do_roll(interaction, expression)
 
 
+# Fixed /ed replies, built once rather than per invalid call
+_USAGE_MSG = f"Usage: `/ed <edition>`\nAllowed: {ALLOWED_EDITIONS}"
+_INVALID_MSG = f"Invalid edition. Choose from: {ALLOWED_EDITIONS}"
+
 @bot.tree.command(name="ed", description="Set or view Shadowrun edition for this context")
 @app_commands.describe(edition="New edition (e.g., SR5)")
 async def ed(
@@ -133,14 +171,14 @@ async def ed(
 ):
     if not edition:
         return await interaction.response.send_message(
-            f"Usage: `/ed <edition>`\nAllowed: {ALLOWED_EDITIONS}",
+            _USAGE_MSG,
             ephemeral=True
         )
 
     inp = edition.upper()
     if inp not in RAW_ALLOWED:
         return await interaction.response.send_message(
-            f"Invalid edition. Choose from: {ALLOWED_EDITIONS}",
+            _INVALID_MSG,
             ephemeral=True
         )
     edition_name = inp if inp.startswith("SR") else f"SR{inp}"
@@ -10,8 +10,10 @@ using MarkdownV2. Includes handlers for:
   - start_command: responding to /start in private chats
   - main: bootstrapping the bot
 """
+import asyncio
 import logging
-from typing import Any, Dict, Literal, cast
+from functools import lru_cache, wraps
+from typing import Dict, Literal, Optional, Tuple, cast
 from telegram import Update, ChatMember
 from telegram.ext import (
     ApplicationBuilder,
@@ -19,6 +21,7 @@ from telegram.ext import (
     ChatMemberHandler,
     CommandHandler,
     ContextTypes,
+    filters,
 )
 from shadowsprite.config import (
     TELEGRAM_TOKEN,
@@ -31,8 +34,10 @@ from shadowsprite.core.db_crud import (
     add_npc,
     get_edition,
     get_chat_edition,
+    get_templates,
     set_edition,
-    get_db
+    template_alias_exists,
+    db_session
 )
 from shadowsprite.core.dice_roller import parse_roll_args, get_roll_results
 from shadowsprite.platforms.bot_helper import (
@@ -45,6 +50,51 @@ from shadowsprite.utils.error_handler import report_telegram_error
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-chat update queues: one worker task drains each chat's queue in order,
+# while different chats are processed concurrently. Concurrent database use is
+# bounded by db_crud's pool slots, so busy periods queue rather than exhaust
+# the connection pool.
+_chat_queues: Dict[int, asyncio.Queue] = {}
+
+def per_chat(handler):
+    """
+    Wrap a handler so PTB's update processing returns immediately and the
+    work runs in a background task. Updates from the same chat are still
+    handled one at a time, in arrival order.
+
+    Args:
+        handler: The async (update, context) handler to dispatch.
+    """
+    @wraps(handler)
+    async def dispatch(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        chat_id = update.effective_chat.id if update.effective_chat else 0
+        queue = _chat_queues.get(chat_id)
+        if queue is None:
+            queue = _chat_queues[chat_id] = asyncio.Queue()
+            context.application.create_task(_drain_chat_queue(chat_id, queue), update=update)
+        queue.put_nowait((handler, update, context))
+    return dispatch
+
+async def _drain_chat_queue(chat_id: int, queue: asyncio.Queue):
+    """
+    Worker task for one chat: run queued handlers in order and exit (dropping
+    the queue) once it is empty. Errors go to the application's error handlers.
+    """
+    while True:
+        try:
+            handler, update, context = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            del _chat_queues[chat_id]
+            return
+        try:
+            await handler(update, context)
+        except Exception as e:
+            await context.application.process_error(update, e)
+
+# Membership transitions that mean the bot was just added to a chat
+_OLD_STATES = frozenset({ChatMember.LEFT, ChatMember.BANNED})
+_NEW_STATES = frozenset({ChatMember.MEMBER, ChatMember.ADMINISTRATOR})
+
 async def bot_added(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handler invoked when the bot is added to a group or channel.
@@ -58,8 +108,8 @@ async def bot_added(update: Update, context: ContextTypes.DEFAULT_TYPE):
         old, new = update.my_chat_member.old_chat_member, update.my_chat_member.new_chat_member
         if (
             new.user.id == context.bot.id
-            and old.status in (ChatMember.LEFT, ChatMember.BANNED)
-            and new.status in (ChatMember.MEMBER, ChatMember.ADMINISTRATOR)
+            and old.status in _OLD_STATES
+            and new.status in _NEW_STATES
         ):
             chat = update.effective_chat
             if chat is not None:
@@ -70,9 +120,19 @@ async def bot_added(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     f"Use /ed <edition> to change this setting."
                 )
 
-from telegram import Update
-from telegram.ext import CallbackContext
 
+# Confirmation reply for /npc_create; fields are MarkdownV2-escaped by the caller.
+_NPC_REPLY_TMPL = (
+    "✅ Created NPC \\#{id}:\n"
+    "• Name: {name}\n"
+    "• Alias: {alias}\n"
+    "• Template: {tmpl}\n"
+    "• Unique: {uniq}\n"
+    "• Shared: {shared}"
+)
+_ALIAS_DROP_TMPL = (
+    "\n⚠️  I dropped alias `{alias}` because aliases only work in group/supergroup chats\\."
+)
 
 async def npc_create_command(update: Update, context: CallbackContext):
     logger.info("🔔 npc_create_command invoked: text=%r", update.message and update.message.text)
@@ -80,12 +140,7 @@ async def npc_create_command(update: Update, context: CallbackContext):
     if update.message is None or update.message.text is None:
         return
     try:
-        full_text = update.message.text
-        command_prefix = '/npc_create'
-        if not full_text.startswith(command_prefix):
-            await update.message.reply_text("Command should start with /npc_create.")
-            return
-        args_text = full_text[len(command_prefix):].strip()
+        args_text = " ".join(context.args or [])
         if not args_text:
             await update.message.reply_text(
                 "Usage: /npc_create <name> [-a alias] [-t template] [-u] [-s]"
@@ -94,31 +149,15 @@ async def npc_create_command(update: Update, context: CallbackContext):
         # 1) Parse out name, alias, template, flags
         npc_args = parse_npc_create_telegram(args_text)
         # 2) Validate name
-        if not npc_args.get('name'):
+        if not npc_args['name']:
             return await update.message.reply_text("Please specify the NPC name.")
         # 3) Detect private chat and drop alias if needed
         chat = update.effective_chat
-        alias_dropped = None
-        if chat and chat.type == 'private' and npc_args.get('alias'):
-            alias_dropped = npc_args['alias']
+        is_private = chat is not None and chat.type == 'private'
+        alias_dropped = npc_args['alias'] if is_private else None
+        if alias_dropped:
             npc_args['alias'] = None
-        # 3.1) If template alias check passed, verify it exists
-        tmpl_alias = npc_args.get('template')
-        if tmpl_alias:
-            db = get_db()
-            cur = db.cursor()
-            cur.execute(
-                "SELECT 1 FROM npcs WHERE alias = %s AND template = 1",
-                (tmpl_alias,)
-            )
-            if cur.fetchone() is None:
-                # no such template!
-                return await update.message.reply_text(
-                    f"❌ Template alias `{tmpl_alias}` not found. "
-                    "Use `/npc_list_templates` to see the available templates.",
-                    parse_mode="MarkdownV2"
-                )
-        # 4) Insert into DB (chat_id=None in private chats)
+        # 4) Identify the owner (chat_id=None in private chats)
         user = update.effective_user
         if not user:
             return await update.message.reply_text("Could not identify you—please try again.")
@@ -126,28 +165,40 @@ async def npc_create_command(update: Update, context: CallbackContext):
             return await update.message.reply_text(
                 "⚠️  Could not determine chat context; NPC creation requires a chat or channel."
             )
-        db_chat_id = None if chat.type == 'private' else chat.id
-        new_id = add_npc(
-            user_id=user.id,
-            chat_id=db_chat_id,
-            npc_args=npc_args
-        )
+        db_chat_id = None if is_private else chat.id
+        # 4.1) Verify the template alias and insert on one connection, handed
+        # back to the pool before replying
+        tmpl_alias = npc_args['template']
+        new_id = None
+        async with db_session():
+            if not tmpl_alias or await template_alias_exists(tmpl_alias):
+                new_id = await asyncio.to_thread(
+                    add_npc,
+                    user_id=user.id,
+                    chat_id=db_chat_id,
+                    npc_args=npc_args
+                )
+        if new_id is None:
+            # no such template!
+            return await update.message.reply_text(
+                f"❌ Template alias `{tmpl_alias}` not found\\. "
+                "Use `/npc_list_templates` to see the available templates\\.",
+                parse_mode="MarkdownV2"
+            )
         # 5) Build confirmation
         safe = markdown_escape_telegram
-        lines = [
-            f"✅ Created NPC #{new_id}:",
-            f"• Name: {safe(npc_args['name'])}",
-            f"• Alias: {safe(npc_args['alias'] or 'none')}",
-            f"• Template: {safe(npc_args['template'] or 'none')}",
-            f"• Unique: {'yes' if npc_args['is_unique'] else 'no'}",
-            f"• Shared: {'yes' if npc_args['shared'] else 'no'}",
-        ]
+        body = _NPC_REPLY_TMPL.format(
+            id=new_id,
+            name=safe(npc_args['name']),
+            alias=safe(npc_args['alias'] or 'none'),
+            tmpl=safe(npc_args['template'] or 'none'),
+            uniq='yes' if npc_args['is_unique'] else 'no',
+            shared='yes' if npc_args['shared'] else 'no',
+        )
         if alias_dropped:
-            lines.append(
-                f"⚠️  I dropped alias `{safe(alias_dropped)}` because aliases only work in group/supergroup chats."
-            )
+            body += _ALIAS_DROP_TMPL.format(alias=safe(alias_dropped))
         # 6) Send it back
-        await update.message.reply_text('\n'.join(lines), parse_mode="MarkdownV2")
+        await update.message.reply_text(body, parse_mode="MarkdownV2")
     except Exception as e:
         context.error = e
         await report_telegram_error(update, context)
@@ -155,6 +206,20 @@ async def npc_create_command(update: Update, context: CallbackContext):
             await update.message.reply_text("⚠️ Something went wrong, the Maker has been notified.")
 
 
+@lru_cache(maxsize=1)
+def _render_templates(rows: Tuple[Tuple[str, Optional[str]], ...]) -> str:
+    """
+    Render the template list as a MarkdownV2 reply.
+    Keyed on the cached rows from get_templates(), so it is only re-rendered
+    when the template list itself changes.
+    """
+    safe = markdown_escape_telegram
+    lines = ["📜 *Available NPC Templates:*"]
+    for name, alias in rows:
+        lines.append(safe(f"• {name} (alias: {alias or '(none)'})"))
+    return "\n".join(lines)
+
+
 async def npc_list_templates(update: Update, context: CallbackContext):
     # Only handle real messages
     if update.message is None:
@@ -166,30 +231,13 @@ async def npc_list_templates(update: Update, context: CallbackContext):
     # For private chats we only show the user's own templates
     chat_id = chat.id if chat and chat.type != 'private' else None
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-    cur.execute(
-        """
-        SELECT name, alias
-          FROM npcs
-         WHERE template = 1
-        """
-    )
-    rows_raw = cur.fetchall()    # type: list[Any]
-    rows: list[Dict[str, Any]] = [cast(Dict[str, Any], r) for r in rows_raw]
+    rows = await get_templates()
 
     if not rows:
         return await update.message.reply_text("📜 You have no NPC templates available.")
 
-    safe = markdown_escape_telegram
-    lines = ["📜 *Available NPC Templates:*"]
-    for row in rows:
-        name  = row["name"]
-        alias = row["alias"] if row["alias"] else "(none)"
-        lines.append(safe(f"• {name} (alias: {alias})"))
-
     await update.message.reply_text(
-        "\n".join(lines),
+        _render_templates(rows),
         parse_mode="MarkdownV2"
     )
 
@@ -245,6 +293,10 @@ async def roll_dice_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     await update.message.reply_text("⚠️ Something went wrong, the Maker has been notified.")
 
 
+# Fixed /ed replies, built once rather than per invalid call
+_USAGE_MSG = f"Usage: /ed <edition>\nAllowed: {ALLOWED_EDITIONS}"
+_INVALID_MSG = f"Invalid edition. Choose from: {ALLOWED_EDITIONS}"
+
 async def set_edition_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handler for /ed — parses the requested edition, enforces permissions,
@@ -253,15 +305,11 @@ async def set_edition_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     if update.message is not None:
         # 1) Validate usage
         if not context.args:
-            return await update.message.reply_text(
-                f"Usage: /ed <edition>\nAllowed: {ALLOWED_EDITIONS}"
-            )
+            return await update.message.reply_text(_USAGE_MSG)
         # 2) Normalize and validate edition token
         inp = context.args[0].upper()
         if inp not in RAW_ALLOWED:
-            return await update.message.reply_text(
-                f"Invalid edition. Choose from: {ALLOWED_EDITIONS}"
-            )
+            return await update.message.reply_text(_INVALID_MSG)
         edition = inp if inp.startswith("SR") else f"SR{inp}"
         if update.effective_user is not None:
             user_id = update.effective_user.id
@@ -311,10 +359,12 @@ async def start_command(update: Update, _context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("Use me in a private chat with /start!")
 
 
-def main():
+def build_telegram_app():
     """
-    Entry point that starts the Telegram bot.
-    Registers command and chat-member handlers, then begins polling.
+    Build the Telegram application and register command and chat-member handlers.
+
+    Returns:
+        The configured (not yet started) telegram.ext.Application.
 
     Raises:
         ValueError: If TELEGRAM_TOKEN is not set in environment.
@@ -324,6 +374,10 @@ def main():
     app = (
         ApplicationBuilder()
         .token(TELEGRAM_TOKEN)
+        # Per-chat handlers reply concurrently: keep a large keep-alive pool
+        # and wait a little longer for a free connection during bursts.
+        .connection_pool_size(256)
+        .pool_timeout(5.0)
         .build()
     )
     # Error log tester
@@ -332,14 +386,27 @@ def main():
         raise RuntimeError("💥 test error")
     app.add_handler(CommandHandler("boom", boom))
     app.add_handler(CommandHandler("help", help_command))
-    app.add_handler(CommandHandler("ed", set_edition_command))
-    app.add_handler(CommandHandler("npc_create", npc_create_command))
-    app.add_handler(CommandHandler("npc_list_templates", npc_list_templates))
-    app.add_handler(CommandHandler(["r", "roll"], roll_dice_command))
-    app.add_handler(CommandHandler("start", start_command))
-    app.add_handler(ChatMemberHandler(bot_added, ChatMemberHandler.MY_CHAT_MEMBER))
+    app.add_handler(CommandHandler("ed", per_chat(set_edition_command)))
+    app.add_handler(CommandHandler(
+        "npc_create",
+        per_chat(npc_create_command),
+        filters=filters.UpdateType.MESSAGE & (filters.ChatType.GROUPS | filters.ChatType.PRIVATE),
+    ))
+    app.add_handler(CommandHandler("npc_list_templates", per_chat(npc_list_templates)))
+    app.add_handler(CommandHandler(["r", "roll"], per_chat(roll_dice_command)))
+    app.add_handler(CommandHandler("start", per_chat(start_command)))
+    app.add_handler(ChatMemberHandler(per_chat(bot_added), ChatMemberHandler.MY_CHAT_MEMBER))
     app.add_error_handler(report_telegram_error)
-    app.run_polling(drop_pending_updates=True)
+    return app
+
+def main():
+    """
+    Entry point that starts the Telegram bot on its own and begins polling.
+
+    Raises:
+        ValueError: If TELEGRAM_TOKEN is not set in environment.
+    """
+    build_telegram_app().run_polling(drop_pending_updates=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,26 +1,96 @@
 # shadowdaemon/run_all_bots.py
 
+import asyncio
+import logging
 import re
+import signal
 import sys
-import threading
 
-from shadowsprite.platforms.telegram_bot import main as run_telegram
-from shadowsprite.platforms.discord_bot import main as run_discord
+import discord
+
+try:
+    import uvloop  # optional: faster event loop on Linux/macOS
+except ImportError:
+    uvloop = None
+
+from shadowsprite.config import DISCORD_TOKEN
+from shadowsprite.platforms.telegram_bot import build_telegram_app
+from shadowsprite.platforms.discord_bot import bot as discord_bot
+from shadowsprite.utils.error_handler import flush_error_reports
+
+logger = logging.getLogger(__name__)
+
+# Backoff between Discord restarts after a fatal client error (seconds)
+DISCORD_RETRY_MIN = 5
+DISCORD_RETRY_MAX = 300
+
+async def run_discord(stop: asyncio.Event):
+    """
+    Run the Discord client until `stop` is set. A Discord failure does not
+    take Telegram down: bad credentials are logged and Discord stays off,
+    anything else (e.g. the API being unreachable) is retried with backoff.
+    """
+    delay = DISCORD_RETRY_MIN
+    while not stop.is_set():
+        try:
+            async with discord_bot:
+                await discord_bot.start(DISCORD_TOKEN)
+            return
+        except discord.LoginFailure:
+            logger.exception("Discord login failed; running Telegram only")
+            return
+        except Exception:
+            logger.exception("Discord client stopped; restarting in %ds", delay)
+        discord_bot.clear()
+        try:
+            await asyncio.wait_for(stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(delay * 2, DISCORD_RETRY_MAX)
+
+async def main_async():
+    if not DISCORD_TOKEN:
+        raise ValueError("Missing DISCORD_TOKEN in config!")
+    telegram_app = build_telegram_app()
+
+    # SIGINT/SIGTERM (Ctrl+C, docker stop, systemctl stop) trigger the
+    # orderly teardown below instead of killing the process.
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:    # Windows: Ctrl+C still cancels main_async
+            pass
+
+    # Both bots share this event loop: Telegram polls in the background
+    # while the Discord client runs as a supervised task.
+    async with telegram_app:
+        await telegram_app.start()
+        await telegram_app.updater.start_polling(drop_pending_updates=True)
+        discord_task = asyncio.create_task(run_discord(stop))
+        try:
+            await stop.wait()
+        finally:
+            # Telegram first, so in-flight per-chat handlers finish and their
+            # error reports can still go out through Discord.
+            await telegram_app.updater.stop()
+            await telegram_app.stop()
+            await flush_error_reports()
+            stop.set()
+            await discord_bot.close()
+            await discord_task
 
 def main():
-    # 1) Start Discord in its own thread
-    discord_thread = threading.Thread(
-        target=run_discord,
-        name="DiscordBotThread",
-        daemon=True
-    )
-    discord_thread.start()
-
-    # 2) Normalize argv for telegram_bot
+    # Normalize argv for telegram_bot
     sys.argv[0] = re.sub(r'(-script\.pyw|\.exe)?$', '', sys.argv[0])
 
-    # 3) Block on Telegram
-    return run_telegram()
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    try:
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            runner.run(main_async())
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -1,6 +1,8 @@
 # shadowsprite/utils/error_handler.py
 
-import logging, sys, traceback
+import asyncio, logging, sys, traceback
+from typing import List, Optional, Tuple
+from cachetools import LRUCache
 from discord import Embed
 from discord.abc import Messageable
 from shadowsprite.config import DISCORD_LOG_CHANNEL_ID
@@ -16,69 +18,220 @@ if not logger.handlers:
     sh.setFormatter(fmt)
     logger.addHandler(sh)
 
+# Discord log channel: the id is parsed once at import, the channel object is
+# resolved by init_error_handler() once the Discord bot is ready.
+try:
+    _LOG_CHANNEL_ID: Optional[int] = int(DISCORD_LOG_CHANNEL_ID)
+except (TypeError, ValueError):
+    logger.error("Invalid DISCORD_LOG_CHANNEL_ID %r", DISCORD_LOG_CHANNEL_ID)
+    _LOG_CHANNEL_ID = None
+_LOG_CHANNEL: Optional[Messageable] = None
+
+# Discord embed field limits for fenced traceback chunks
+FENCE_PREFIX = "```py\n"
+FENCE_SUFFIX = "\n```"
+MAX_FIELD_LEN = 1024
+MAX_TB_CHUNK = MAX_FIELD_LEN - (len(FENCE_PREFIX) + len(FENCE_SUFFIX))
+
+# Discord embed limits and the error-report coalescing window: reports queued
+# within BATCH_WINDOW seconds (up to BATCH_MAX_ITEMS) go out as one message.
+EMBED_MAX_FIELDS = 25
+EMBED_MAX_CHARS = 6000
+BATCH_MAX_ITEMS = 10
+BATCH_WINDOW = 1.0
+
+# Pending (title, description, traceback) reports, drained by _drain_error_reports()
+_report_queue: "asyncio.Queue[Tuple[str, str, str]]" = asyncio.Queue()
+_report_task: Optional[asyncio.Task] = None
+
+# Formatted tracebacks for recently seen errors, so a flood of the same failure
+# is only formatted once.
+_tb_cache: LRUCache = LRUCache(maxsize=128)
+
+def _safe_str(error: object) -> str:
+    """str() that never raises, with the same placeholder traceback uses."""
+    try:
+        return str(error)
+    except Exception:
+        return "<exception str() failed>"
+
+def _traceback_key(error: BaseException) -> tuple:
+    """
+    Identify an error by everything format_exception() prints: type, message
+    and full frame chain of the exception and of each chained cause/context.
+    """
+    key = []
+    seen = set()
+    exc: Optional[BaseException] = error
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        frames = []
+        tb_obj = exc.__traceback__
+        while tb_obj is not None:
+            frames.append((tb_obj.tb_frame.f_code, tb_obj.tb_lineno))
+            tb_obj = tb_obj.tb_next
+        key.append((type(exc), _safe_str(exc), tuple(frames)))
+        exc = exc.__cause__ or (None if exc.__suppress_context__ else exc.__context__)
+    return tuple(key)
+
+def format_error_traceback(error: BaseException) -> str:
+    """
+    Format the traceback carried by ``error`` itself (not ``sys.exc_info()``),
+    reusing the cached text for repeats of the same error along the same stack.
+    """
+    key = _traceback_key(error)
+    tb = _tb_cache.get(key)
+    if tb is None:
+        tb = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        _tb_cache[key] = tb
+    return tb
+
+def init_error_handler(discord_bot) -> Optional[Messageable]:
+    """
+    Resolve and cache the Discord log channel and start the report consumer.
+    Call once the bot is ready (its channel cache is only populated after
+    on_ready); repeated calls on reconnect reuse the running consumer.
+    """
+    global _LOG_CHANNEL, _report_task
+    if _LOG_CHANNEL_ID is None:
+        return None
+    channel = discord_bot.get_channel(_LOG_CHANNEL_ID)
+    if channel is None:
+        logger.warning("Discord log channel %d not found", _LOG_CHANNEL_ID)
+        return None
+    if not isinstance(channel, Messageable):
+        logger.warning(
+            "Discord log channel %r is not messageable (type=%s)",
+            channel, type(channel).__name__
+        )
+        return None
+    _LOG_CHANNEL = channel
+    if _report_task is None or _report_task.done():
+        _report_task = asyncio.get_running_loop().create_task(_drain_error_reports())
+    return channel
+
 def chunked_traceback(tb: str, max_size: int):
     for i in range(0, len(tb), max_size):
         yield tb[i:i + max_size]
 
+def _traceback_fields(tb: str) -> List[Tuple[str, str]]:
+    """Split a traceback into fenced fields that fit Discord's 1024-char limit."""
+    return [
+        ("Traceback" if idx == 0 else f"Traceback (cont. {idx})", f"{FENCE_PREFIX}{chunk}{FENCE_SUFFIX}")
+        for idx, chunk in enumerate(chunked_traceback(tb, MAX_TB_CHUNK))
+    ]
+
+def _summary_field(title: str, description: str, tb: str) -> Tuple[str, str]:
+    """One field per error for a coalesced report: its details plus the tail of its traceback."""
+    head = f"{description[:MAX_FIELD_LEN // 2]}\n{FENCE_PREFIX}"
+    room = MAX_FIELD_LEN - len(head) - len(FENCE_SUFFIX)
+    return title, f"{head}{tb[-room:]}{FENCE_SUFFIX}"
+
+def _build_report_embeds(batch: List[Tuple[str, str, str]]) -> List[Embed]:
+    """
+    Render a batch of queued reports. A single report keeps the full chunked
+    traceback; several are summarized one field each. Fields are spread over
+    as many embeds as needed to stay within the 25-field / 6000-char caps.
+    """
+    if len(batch) == 1:
+        title, description, tb = batch[0]
+        # Long error messages would otherwise eat the whole 6000-char budget
+        description = description[:2 * MAX_FIELD_LEN]
+        fields = _traceback_fields(tb)
+    else:
+        title, description = f"{len(batch)} errors reported", ""
+        fields = [_summary_field(*report) for report in batch]
+
+    embeds = [Embed(title=title, description=description, color=0xE74C3C)]
+    size = len(title) + len(description)
+    for name, value in fields:
+        cost = len(name) + len(value)
+        if len(embeds[-1].fields) >= EMBED_MAX_FIELDS or size + cost > EMBED_MAX_CHARS:
+            cont = f"{title} (cont.)"
+            embeds.append(Embed(title=cont, color=0xE74C3C))
+            size = len(cont)
+        embeds[-1].add_field(name=name, value=value, inline=False)
+        size += cost
+    return embeds
+
+async def _drain_error_reports():
+    """
+    Background consumer: wait for a report, collect whatever else arrives
+    within BATCH_WINDOW (up to BATCH_MAX_ITEMS), and send it as one message.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _report_queue.get()]
+        deadline = loop.time() + BATCH_WINDOW
+        while len(batch) < BATCH_MAX_ITEMS:
+            try:
+                batch.append(await asyncio.wait_for(_report_queue.get(), deadline - loop.time()))
+            except asyncio.TimeoutError:
+                break
+        channel = _LOG_CHANNEL
+        try:
+            if channel is None:
+                continue
+            for embed in _build_report_embeds(batch):
+                try:
+                    await channel.send(embed=embed)
+                except Exception:
+                    logger.exception("Failed to send error report to Discord channel %s", _LOG_CHANNEL_ID)
+        finally:
+            for _ in batch:
+                _report_queue.task_done()
+
+async def flush_error_reports(timeout: float = 5.0):
+    """
+    Wait (at most ``timeout`` seconds) for queued error reports to be sent.
+    Called at shutdown, before the Discord client is closed.
+    """
+    if _report_task is None or _report_task.done():
+        return
+    try:
+        await asyncio.wait_for(_report_queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Shutting down with %d error reports unsent", _report_queue.qsize())
+
 async def report_discord_error(bot_client, interaction, command_name, error):
     """
-    Log error to file and send embed to the configured Discord log channel.
+    Log error to file and queue an embed for the configured Discord log channel.
     """
-    tb = traceback.format_exc()
+    tb = format_error_traceback(error)
     # 1) Log to disk
     logger.error(f"Error in {command_name} by {interaction.user}:\n{tb}")
-    # 2) Notify in Discord channel
-    channel = bot_client.get_channel(DISCORD_LOG_CHANNEL_ID)
-    if channel:
-        embed = Embed(
-            title=f"Error in {command_name}",
-            description=(
-                f"**User:** {interaction.user.mention}\n"
-                f"**Guild:** {interaction.guild_id}\n"
-                f"**Error:** `{error}`"
-            ),
-            color=0xE74C3C
-        )
-        trace_field = tb if len(tb) < 1024 else tb[-1024:]
-        embed.add_field(name="Traceback", value=f"```py\n{trace_field}\n```", inline=False)
-        await channel.send(embed=embed)
+    # 2) Queue the Discord notification
+    if _LOG_CHANNEL or init_error_handler(bot_client):
+        _report_queue.put_nowait((
+            f"Error in {command_name}",
+            f"**User:** {interaction.user.mention}\n"
+            f"**Guild:** {interaction.guild_id}\n"
+            f"**Error:** `{_safe_str(error)}`",
+            tb,
+        ))
 
 
 async def report_telegram_error(update: object, context: ContextTypes.DEFAULT_TYPE):
     """
-    Log Telegram errors to file and relay them into the Discord log channel.
-    Splits the traceback into 1024-char fenced chunks so Discord will accept it.
+    Log Telegram errors to file and queue them for the Discord log channel.
+    The traceback is split into 1024-char fenced chunks so Discord will accept it.
     """
     # 1) Extract the exception and full traceback
     error = context.error
     if error is not None:
-        tb = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        tb = format_error_traceback(error)
     else:
         tb = "No traceback available"
 
     # 2) Log locally
-    logger.error("🚨 Telegram handler error:\n%s\n%s", error, tb)
-
-    # 3) Get the Discord channel
-    try:
-        channel_id = int(DISCORD_LOG_CHANNEL_ID)
-    except Exception:
-        logger.exception("Invalid DISCORD_LOG_CHANNEL_ID %r", DISCORD_LOG_CHANNEL_ID)
-        return
+    logger.error("🚨 Telegram handler error:\n%s\n%s", _safe_str(error), tb)
 
-    from shadowsprite.platforms.discord_bot import bot as discord_bot
-    channel = discord_bot.get_channel(channel_id)
-    if channel is None:
-        logger.warning("Discord log channel %d not found", channel_id)
-        return
-    if not isinstance(channel, Messageable):
-        logger.warning(
-            "Discord log channel %r is not messageable (type=%s)",
-            channel, type(channel).__name__
-        )
+    # 3) Check the cached Discord channel
+    if _LOG_CHANNEL is None:
+        logger.warning("Discord log channel not resolved; Telegram error not relayed")
         return
 
-    # 4) Build the base embed
+    # 4) Queue the report; the consumer coalesces bursts into one message
     if isinstance(update, Update):
         user = update.effective_user.id if update.effective_user else "unknown"
         chat = update.effective_chat.id if update.effective_chat else "unknown"
@@ -86,37 +239,10 @@ async def report_telegram_error(update: object, context: ContextTypes.DEFAULT_TY
         user = "unknown"
         chat = "unknown"
 
-    embed = Embed(
-        title="Error in Telegram handler",
-        description=(
-            f"**User:** {user}\n"
-            f"**Chat:** {chat}\n"
-            f"**Error:** `{error}`"
-        ),
-        color=0xE74C3C
-    )
-
-    # 5) Split the traceback into chunks that fit within Discord's 1024-char limit
-    FENCE_PREFIX = "```py\n"
-    FENCE_SUFFIX = "\n```"
-    MAX_FIELD_LEN = 1024
-
-    # calculate how many characters of the raw traceback per chunk
-    max_tb_chunk = MAX_FIELD_LEN - (len(FENCE_PREFIX) + len(FENCE_SUFFIX))
-
-    # iterate over the traceback in slices
-    for idx in range(0, len(tb), max_tb_chunk):
-        chunk = tb[idx : idx + max_tb_chunk]
-        field_name = "Traceback" if idx == 0 else f"Traceback (cont. {idx // max_tb_chunk})"
-        embed.add_field(
-            name=field_name,
-            value=f"{FENCE_PREFIX}{chunk}{FENCE_SUFFIX}",
-            inline=False
-        )
-
-    # 6) Send the embed via the bot's loop
-    try:
-        discord_bot.loop.create_task(channel.send(embed=embed))
-        logger.info("Scheduled Telegram error report to Discord channel %d", channel_id)
-    except Exception:
-        logger.exception("Failed to schedule error-report task on Discord loop")
\ No newline at end of file
+    _report_queue.put_nowait((
+        "Error in Telegram handler",
+        f"**User:** {user}\n"
+        f"**Chat:** {chat}\n"
+        f"**Error:** `{_safe_str(error)}`",
+        tb,
+    ))